@@ -0,0 +1,152 @@
+"""Compare the mmap store against the Chroma store on a repository.
+
+Usage: python -m benchmarks.store --repo PATH [--queries N]
+
+Both stores are indexed from the same repository, then queried with a sample
+of the indexed chunks. A query fetches the ids, texts and aliases of the
+nearest chunks, as a search does, but reranking is excluded. Recall@10 is
+measured against an exact float32 search.
+
+Chroma is indexed into a temporary directory of its own, so that its disk
+usage covers only this collection. Opening a store is timed in a fresh
+process, without loading the embedding model.
+"""
+
+from __future__ import annotations
+
+import subprocess
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Final
+
+import click
+import numpy as np
+from chromadb import PersistentClient
+from rich.console import Console
+from rich.table import Table
+
+from ask_the_code.config import Config
+from ask_the_code.store.chroma import ChromaStore
+from ask_the_code.store.mmap import META_FILE, N_RESULTS, VECTORS_FILE, MmapStore
+
+OPEN_CHROMA: Final = """
+import sys, time
+from chromadb import PersistentClient
+start = time.perf_counter()
+PersistentClient(sys.argv[1]).get_collection(sys.argv[2], embedding_function=None)
+print((time.perf_counter() - start) * 1000)
+"""
+OPEN_MMAP: Final = f"""
+import json, sys, time
+from pathlib import Path
+import numpy as np
+start = time.perf_counter()
+path = Path(sys.argv[1])
+json.loads((path / "{META_FILE}").read_text())
+np.load(path / "{VECTORS_FILE}", mmap_mode="r")
+print((time.perf_counter() - start) * 1000)
+"""
+
+
+def _timed(func: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+
+def _timed_open(script: str, *args: str) -> float:
+    """Time opening a store in a fresh process, excluding interpreter start and imports."""
+    result = subprocess.run(
+        [sys.executable, "-c", script, *args], capture_output=True, check=True, text=True
+    )
+    return float(result.stdout)
+
+
+def _disk_size(path: Path) -> int:
+    return sum(file.stat().st_size for file in path.rglob("*") if file.is_file())
+
+
+def _recall(found: list[list[str]], expected: list[list[str]]) -> float:
+    hits = sum(len(set(f) & set(e)) for f, e in zip(found, expected))
+    return hits / sum(len(e) for e in expected)
+
+
+@click.command()
+@click.option("-r", "--repo", type=Path, default=Path.cwd())
+@click.option("-q", "--queries", default=100)
+@click.option("--dtype", type=click.Choice(["float16", "int8"]), default="float16")
+def main(repo: Path, queries: int, dtype: str) -> None:
+    with TemporaryDirectory() as chroma_path:
+        _benchmark(repo, queries, dtype, Path(chroma_path))
+
+
+def _benchmark(repo: Path, queries: int, dtype: str, chroma_path: Path) -> None:
+    console = Console()
+    config = Config.create(repo=repo, mmap_dtype=dtype)
+    chroma, mmap = ChromaStore(config), MmapStore(config)
+    chroma.client = PersistentClient(str(chroma_path))
+    for store in (chroma, mmap):
+        for _ in store.create():
+            pass
+
+    docs = mmap._read_docs()  # noqa: SLF001
+    ids, texts = docs["id"].to_list(), docs["doc"].to_list()
+    vectors = mmap.embedder.embed(texts)
+    rng = np.random.default_rng(0)
+    sample = rng.choice(len(texts), min(queries, len(texts)), replace=False)
+    query_vectors = vectors[sample]
+    expected = [[ids[i] for i in np.argsort(-(vectors @ q))[:N_RESULTS]] for q in query_vectors]
+
+    # Both stores fetch what a search reranks: the ids, texts and aliases
+    collection = chroma._get_collection(chroma.collection_name)  # noqa: SLF001
+
+    def query_chroma() -> list[list[str]]:
+        return [
+            collection.query(  # type: ignore[attr-defined]
+                query_embeddings=[q.tolist()],
+                n_results=N_RESULTS,
+                include=["documents", "metadatas"],
+            )["ids"][0]
+            for q in query_vectors
+        ]
+
+    def query_mmap() -> list[list[str]]:
+        return [
+            mmap._candidates(q, len(ids))["source"].to_list()  # noqa: SLF001
+            for q in query_vectors
+        ]
+
+    chroma_found, mmap_found = query_chroma(), query_mmap()
+
+    table = Table(title=f"{len(ids)} chunks, {len(query_vectors)} queries")
+    table.add_column("Metric", style="bold blue")
+    table.add_column("Chroma")
+    table.add_column(f"Mmap ({dtype})")
+    table.add_row(
+        "Open (ms)",
+        f"{_timed_open(OPEN_CHROMA, str(chroma_path), chroma.collection_name):.2f}",
+        f"{_timed_open(OPEN_MMAP, str(mmap.collection_path)):.2f}",
+    )
+    table.add_row(
+        "Query (ms)",
+        f"{_timed(query_chroma) / len(query_vectors):.3f}",
+        f"{_timed(query_mmap) / len(query_vectors):.3f}",
+    )
+    table.add_row(
+        f"Recall@{N_RESULTS}",
+        f"{_recall(chroma_found, expected):.3f}",
+        f"{_recall(mmap_found, expected):.3f}",
+    )
+    table.add_row(
+        "Disk (KiB)",
+        f"{_disk_size(chroma_path) / 1024:.0f}",
+        f"{_disk_size(mmap.collection_path) / 1024:.0f}",
+    )
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
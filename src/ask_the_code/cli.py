@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import click
@@ -15,7 +16,7 @@ from typing_extensions import override
 from ask_the_code.__about__ import __version__
 from ask_the_code.config import Config
 from ask_the_code.dependency import get_config, get_console, get_llm, get_store
-from ask_the_code.error import AskError, CollectionNotFoundError
+from ask_the_code.error import AskError, CollectionNotFoundError, EmbeddingMismatchError
 from ask_the_code.llm import LLM
 from ask_the_code.store import Store
 from ask_the_code.utils import clean_data_home
@@ -54,6 +55,22 @@ def ask(  # noqa: PLR0913
 ) -> None:
     """Ask a question about the documentation."""
     del config, repo  # Unused
+    # Fail on a missing or outdated index before loading any model
+    store().check()
+
+    executor = ThreadPoolExecutor()
+    try:
+        # Load the LLM, store and reranker concurrently instead of one after another
+        _ = executor.submit(llm().warm_up)
+        for future in [executor.submit(step) for step in store().warm_up()]:
+            _ = future.result()
+    except BaseException:
+        # Report the error without waiting for the other steps, e.g. a model download
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    # The LLM may still be loading, answering waits for it
+    executor.shutdown(wait=False)
+
     sources = store().search(question)
     response_stream = llm().answer(sources, question)
 
@@ -87,6 +104,11 @@ def create(
         for _ in progress.track(store().create(), description="Indexing"):
             pass
     console.print("[green]Indexing complete![/green]")
+    if stats := store().dedup_stats:
+        console.print(
+            f"Indexed {stats['chunks'] - stats['duplicates']} of {stats['chunks']} chunks, "
+            f"{stats['duplicates']} near-duplicates were stored as aliases"
+        )
 
 
 @cli.command()
@@ -110,7 +132,8 @@ def search(
     source_table.add_column("Text")
 
     for source in sources:
-        source_table.add_row(str(source["score"]), source["source"], Markdown(source["text"]))
+        sources_cell = "\n".join([source["source"], *source.get("aliases", [])])
+        source_table.add_row(str(source["score"]), sources_cell, Markdown(source["text"]))
     console.print(source_table)
 
 
@@ -121,6 +144,8 @@ def run(console: Console = Depends(get_console)) -> None:
         cli()
     except CollectionNotFoundError as e:
         console.print(f"[red]{e}, run `ask create` to create the collection[/red]")
+    except EmbeddingMismatchError as e:
+        console.print(f"[red]{e}, run `ask create` to rebuild the collection[/red]")
     except AskError as e:
         console.print(f"[red]{e}[/red]")
     except KeyboardInterrupt:
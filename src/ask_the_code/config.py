@@ -1,9 +1,9 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Any
+from typing import Any, Literal
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from ask_the_code import utils
 
@@ -25,6 +25,17 @@ class Config(BaseModel):
 
     reranker_model: str = "BAAI/bge-reranker-large"
 
+    embedding_backend: Literal["sentence-transformers", "onnx"] = "sentence-transformers"
+    embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"
+    embedding_threads: int = 0
+    embedding_batch_chars: int = 16_384
+
+    # At most the 64 bits of a SimHash, split into `dedup_max_distance + 1` bands
+    dedup_max_distance: int = Field(default=3, ge=0, lt=64)
+
+    mmap_dtype: Literal["float16", "int8"] = "float16"
+    mmap_hnsw_threshold: int = 50_000
+
     @staticmethod
     def create(**kwargs: Any) -> Config:
         from dynaconf import Dynaconf
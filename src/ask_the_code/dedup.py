@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import re
+from collections import defaultdict
+from hashlib import blake2b
+from typing import Final
+
+import numpy as np
+
+from ask_the_code.chunkers import Source, Text
+from ask_the_code.types import DedupStats
+
+HASH_BITS: Final = 64
+SHINGLE_SIZE: Final = 3
+TOKEN_PATTERN: Final = re.compile(r"\w+")
+
+
+def simhash(text: str) -> int | None:
+    """Compute a 64-bit SimHash over the word shingles of a text.
+
+    Text without any words (e.g. a table rule or `* * *`) has nothing to
+    compare, so it has no hash rather than one shared by all such texts.
+    """
+    tokens = TOKEN_PATTERN.findall(text.lower())
+    if not tokens:
+        return None
+    shingles = [
+        " ".join(tokens[i : i + SHINGLE_SIZE])
+        for i in range(max(len(tokens) - SHINGLE_SIZE + 1, 1))
+    ]
+    digests = b"".join(blake2b(s.encode(), digest_size=8).digest() for s in shingles)
+    bits = np.unpackbits(np.frombuffer(digests, np.uint8)).reshape(-1, HASH_BITS)
+    votes = bits.sum(axis=0, dtype=np.int64) * 2 > len(shingles)
+    return int.from_bytes(np.packbits(votes).tobytes(), "big")
+
+
+class Deduplicator:
+    """Fold near-duplicate chunks into the first chunk seen with that content.
+
+    Chunks whose SimHashes differ in at most `max_distance` bits are
+    duplicates. The hash is split into `max_distance + 1` bands, so any
+    duplicate shares at least one band exactly with its canonical chunk and
+    only chunks in the same band bucket need comparing. Chunks without any
+    words are never folded.
+    """
+
+    aliases: dict[Source, list[Source]]
+    hashes: dict[Source, int]
+
+    def __init__(self, max_distance: int) -> None:
+        if not 0 <= max_distance < HASH_BITS:
+            err_msg = f"max_distance must be between 0 and {HASH_BITS - 1}: {max_distance}"
+            raise ValueError(err_msg)
+        self._max_distance = max_distance
+        self._band_count = max_distance + 1
+        self._band_bits = HASH_BITS // self._band_count
+        self._sources: list[Source] = []
+        self._hashes: list[int] = []
+        self._buckets: list[dict[int, list[int]]] = [
+            defaultdict(list) for _ in range(self._band_count)
+        ]
+        self._chunks = 0
+        self._duplicates = 0
+        self.aliases = {}
+        self.hashes = {}
+
+    @property
+    def stats(self) -> DedupStats:
+        return {"chunks": self._chunks, "duplicates": self._duplicates}
+
+    def _bands(self, value: int) -> list[int]:
+        band_mask = (1 << self._band_bits) - 1
+        return [(value >> (i * self._band_bits)) & band_mask for i in range(self._band_count)]
+
+    def register(self, source: Source, value: int) -> None:
+        """Register an already stored canonical chunk by its SimHash."""
+        for bucket, band in zip(self._buckets, self._bands(value)):
+            bucket[band].append(len(self._sources))
+        self._sources.append(source)
+        self._hashes.append(value)
+        self.hashes[source] = value
+
+    def add(self, source: Source, text: Text) -> Source | None:
+        """Register a chunk, returning its canonical source if it is a duplicate."""
+        self._chunks += 1
+        if (value := simhash(text)) is None:
+            return None
+
+        for bucket, band in zip(self._buckets, self._bands(value)):
+            for index in bucket.get(band, []):
+                if bin(self._hashes[index] ^ value).count("1") <= self._max_distance:
+                    canonical = self._sources[index]
+                    if canonical != source:
+                        self.aliases.setdefault(canonical, []).append(source)
+                    self._duplicates += 1
+                    return canonical
+
+        self.register(source, value)
+        return None
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable, Sequence
+from typing import Final
+
+import numpy as np
+import numpy.typing as npt
+from typing_extensions import Protocol
+
+from ask_the_code.config import Config as AskConfig
+
+EMBEDDING_DIR: Final = "embedding"
+MAX_BATCH_SIZE: Final = 128
+
+Vectors = npt.NDArray[np.float32]
+
+
+class Embedder(Protocol):
+    @property
+    def fingerprint(self) -> str:
+        """Identify the model, so vectors from different models are never mixed."""
+        ...
+
+    def embed(self, texts: Sequence[str]) -> Vectors:
+        """Embed texts into L2-normalized vectors."""
+        ...
+
+    def warm_up(self) -> None:
+        """Load everything needed to embed, so that the first `embed` doesn't."""
+        ...
+
+
+def get_embedder(config: AskConfig) -> Embedder:
+    if config.embedding_backend == "sentence-transformers":
+        from ask_the_code.embedding.sbert import SentenceTransformerEmbedder
+
+        return SentenceTransformerEmbedder(config)
+    if config.embedding_backend == "onnx":
+        from ask_the_code.embedding.onnx import OnnxEmbedder
+
+        return OnnxEmbedder(config)
+    err_msg = f"Unknown embedding backend: {config.embedding_backend}"
+    raise ValueError(err_msg)
+
+
+def sorted_batches(texts: Sequence[str], max_batch_chars: int) -> Iterable[list[int]]:
+    """Group text indices into batches of similar length, longest first.
+
+    A batch is padded to its longest text, so a batch grows until its padded
+    size would exceed `max_batch_chars`.
+    """
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]), reverse=True)
+    batch: list[int] = []
+    for i in order:
+        if batch:
+            padded = (len(batch) + 1) * max(len(texts[batch[0]]), 1)
+            if len(batch) >= MAX_BATCH_SIZE or padded > max_batch_chars:
+                yield batch
+                batch = []
+        batch.append(i)
+    if batch:
+        yield batch
+
+
+def embed_batched(
+    texts: Sequence[str], encode: Callable[[list[str]], Vectors], max_batch_chars: int
+) -> Vectors:
+    """Embed texts in length-sorted batches, returning vectors in the original order."""
+    vectors: Vectors | None = None
+    for batch in sorted_batches(texts, max_batch_chars):
+        encoded = encode([texts[i] for i in batch])
+        if vectors is None:
+            vectors = np.empty((len(texts), encoded.shape[1]), np.float32)
+        vectors[batch] = encoded
+    return vectors if vectors is not None else np.empty((0, 0), np.float32)
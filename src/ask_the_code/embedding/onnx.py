@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import json
+from collections.abc import Sequence
+from functools import cached_property
+from pathlib import Path
+from typing import Any, Final, cast
+
+import numpy as np
+import onnxruntime as ort
+
+from ask_the_code.config import Config
+from ask_the_code.embedding import EMBEDDING_DIR, Vectors, embed_batched
+from ask_the_code.error import UnsupportedModelError
+from ask_the_code.utils import cache_home
+
+ONNX_MODEL_FILE: Final = "onnx/model.onnx"
+MODULE_PREFIX: Final = "sentence_transformers.models."
+# Normalize is a no-op here, every vector is normalized after pooling
+SUPPORTED_MODULES: Final = frozenset({"Transformer", "Pooling", "Normalize"})
+SUPPORTED_POOLING: Final = frozenset({"cls_token", "mean_tokens"})
+
+
+class OnnxEmbedder:
+    """Run a sentence-transformers model exported to ONNX (`onnx/model.onnx`).
+
+    Only the transformer, CLS or mean pooling and normalization are reproduced,
+    models with any other module (e.g. `2_Dense`) or pooling mode are refused.
+    """
+
+    _model_name: Final[str]
+    _threads: Final[int]
+    _max_batch_chars: Final[int]
+
+    def __init__(self, config: Config) -> None:
+        self._model_name = config.embedding_model
+        self._threads = config.embedding_threads
+        self._max_batch_chars = config.embedding_batch_chars
+
+    @cached_property
+    def model_path(self) -> Path:
+        if (path := Path(self._model_name)).is_dir():
+            return path
+
+        from huggingface_hub import snapshot_download
+
+        return Path(
+            snapshot_download(
+                self._model_name,
+                allow_patterns=["*.json", "*.txt", ONNX_MODEL_FILE],
+                cache_dir=str(cache_home() / EMBEDDING_DIR),
+            )
+        )
+
+    @cached_property
+    def session(self) -> ort.InferenceSession:
+        options = ort.SessionOptions()
+        if self._threads > 0:
+            options.intra_op_num_threads = self._threads
+            options.inter_op_num_threads = 1
+        return ort.InferenceSession(
+            str(self.model_path / ONNX_MODEL_FILE),
+            options,
+            providers=["CPUExecutionProvider"],
+        )
+
+    @cached_property
+    def tokenizer(self) -> Any:
+        from transformers import AutoTokenizer
+
+        return AutoTokenizer.from_pretrained(str(self.model_path))
+
+    @cached_property
+    def max_length(self) -> int:
+        """Truncate where sentence-transformers does, so both backends embed the same tokens."""
+        config: dict[str, Any] = self._read_json("sentence_bert_config.json") or {}
+        if max_length := config.get("max_seq_length"):
+            return int(max_length)
+        model_config: dict[str, Any] = self._read_json("config.json") or {}
+        limits = [model_config.get("max_position_embeddings"), self.tokenizer.model_max_length]
+        return min(int(limit) for limit in limits if limit)
+
+    @cached_property
+    def pooling(self) -> str:
+        modules: list[dict[str, str]] = self._read_json("modules.json") or []
+        pooling_path = "1_Pooling"
+        for module in modules:
+            name = module["type"].removeprefix(MODULE_PREFIX)
+            if name not in SUPPORTED_MODULES:
+                raise UnsupportedModelError(self._model_name, f"{module['type']} module")
+            if name == "Pooling":
+                pooling_path = module["path"]
+
+        config: dict[str, Any] = self._read_json(f"{pooling_path}/config.json") or {}
+        modes = [
+            key.removeprefix("pooling_mode_")
+            for key, enabled in config.items()
+            if key.startswith("pooling_mode_") and enabled
+        ]
+        if not modes:
+            return "mean_tokens"
+        if len(modes) > 1 or modes[0] not in SUPPORTED_POOLING:
+            raise UnsupportedModelError(self._model_name, f"{', '.join(modes)} pooling")
+        return modes[0]
+
+    @property
+    def fingerprint(self) -> str:
+        # Never identify vectors this backend can't produce the same way as sentence-transformers
+        _ = self.pooling
+        dimension = self._read_json("config.json")["hidden_size"]
+        return f"{self._model_name}:{dimension}"
+
+    def _read_json(self, name: str) -> Any:
+        path = self.model_path / name
+        return json.loads(path.read_text()) if path.exists() else None
+
+    def _encode(self, texts: list[str]) -> Vectors:
+        tokens = self.tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=self.max_length,
+            return_tensors="np",
+        )
+        mask = tokens["attention_mask"]
+        inputs = {
+            node.name: tokens.get(node.name, np.zeros_like(mask)).astype(np.int64)
+            for node in self.session.get_inputs()
+        }
+        hidden = self.session.run(None, inputs)[0]
+
+        if self.pooling == "cls_token":
+            vectors = hidden[:, 0]
+        else:
+            weights = mask[:, :, None].astype(np.float32)
+            vectors = (hidden * weights).sum(axis=1) / np.maximum(weights.sum(axis=1), 1e-9)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return cast(Vectors, (vectors / np.maximum(norms, 1e-12)).astype(np.float32))
+
+    def embed(self, texts: Sequence[str]) -> Vectors:
+        """Embed texts into L2-normalized vectors."""
+        return embed_batched(texts, self._encode, self._max_batch_chars)
+
+    def warm_up(self) -> None:
+        """Download the model if needed, then load the session, tokenizer and config."""
+        _ = self.session, self.tokenizer, self.max_length, self.pooling
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+from functools import cached_property
+from typing import Final, cast
+
+from sentence_transformers import SentenceTransformer
+
+from ask_the_code.config import Config
+from ask_the_code.embedding import EMBEDDING_DIR, Vectors, embed_batched
+from ask_the_code.utils import cache_home
+
+
+class SentenceTransformerEmbedder:
+    _model_name: Final[str]
+    _threads: Final[int]
+    _max_batch_chars: Final[int]
+
+    def __init__(self, config: Config) -> None:
+        self._model_name = config.embedding_model
+        self._threads = config.embedding_threads
+        self._max_batch_chars = config.embedding_batch_chars
+
+    @cached_property
+    def model(self) -> SentenceTransformer:
+        if self._threads > 0:
+            import torch
+
+            torch.set_num_threads(self._threads)
+
+        return SentenceTransformer(
+            self._model_name,
+            device="cpu",
+            cache_folder=str(cache_home() / EMBEDDING_DIR),
+        )
+
+    @property
+    def fingerprint(self) -> str:
+        return f"{self._model_name}:{self.model.get_sentence_embedding_dimension()}"
+
+    def _encode(self, texts: list[str]) -> Vectors:
+        vectors = self.model.encode(
+            texts,
+            batch_size=len(texts),
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+        )
+        return cast(Vectors, vectors)
+
+    def embed(self, texts: Sequence[str]) -> Vectors:
+        """Embed texts into L2-normalized vectors."""
+        return embed_batched(texts, self._encode, self._max_batch_chars)
+
+    def warm_up(self) -> None:
+        """Load the model."""
+        _ = self.model
@@ -1,3 +1,6 @@
+from __future__ import annotations
+
+
 class AskError(Exception):
     pass
 
@@ -8,3 +11,22 @@ class CollectionNotFoundError(AskError):
     def __init__(self, collection_name: str) -> None:
         self.collection_name = collection_name
         super().__init__(f"Collection {collection_name} not found")
+
+
+class EmbeddingMismatchError(AskError):
+    collection_name: str
+
+    def __init__(self, collection_name: str, indexed: str | None, configured: str) -> None:
+        self.collection_name = collection_name
+        super().__init__(
+            f"Collection {collection_name} was indexed with embedding model {indexed}, "
+            f"but {configured} is configured"
+        )
+
+
+class UnsupportedModelError(AskError):
+    model_name: str
+
+    def __init__(self, model_name: str, reason: str) -> None:
+        self.model_name = model_name
+        super().__init__(f"Embedding model {model_name} is not supported: {reason}")
@@ -11,6 +11,8 @@ from ask_the_code.types import DocSource
 class LLM(Protocol):
     def answer(self, context: Collection[DocSource], question: str) -> Iterable[str]: ...
 
+    def warm_up(self) -> None: ...
+
 
 def get_llm(config: AskConfig) -> LLM:
     if config.llm == "ollama":
@@ -18,7 +18,10 @@ class Ollama:
 
     def answer(self, context: Collection[DocSource], question: str) -> Iterable[str]:
         """Generate an answer based on user input using a LLM and Store."""
-        sources = "\n".join((source["source"] + ":\n " + source["text"]) for source in context)
+        sources = "\n".join(
+            (", ".join([source["source"], *source.get("aliases", [])]) + ":\n " + source["text"])
+            for source in context
+        )
 
         prompt = f"""
         Given the following extracted parts of a document ("SOURCES") and a question ("QUESTION").
@@ -35,6 +38,10 @@ class Ollama:
 
         yield from self.generate(prompt)
 
+    def warm_up(self) -> None:
+        """Load the model into memory, a generate request without a prompt only loads it."""
+        _ = self._client.generate(self._model)
+
     def generate(self, prompt: str) -> Iterable[str]:
         for resp in self._client.generate(self._model, prompt=prompt, stream=True):
             if "response" in resp and isinstance(resp["response"], str):
@@ -1,12 +1,16 @@
-from collections.abc import Collection, Iterable
+from __future__ import annotations
+
+from collections.abc import Callable, Collection, Iterable
 from pathlib import Path
 from typing import Protocol
 
 from ask_the_code.config import Config
-from ask_the_code.types import DocSource
+from ask_the_code.types import DedupStats, DocSource
 
 
 class Store(Protocol):
+    dedup_stats: DedupStats | None
+
     def create(self) -> Iterable[str]:
         """Create the store."""
         ...
@@ -19,16 +23,28 @@ class Store(Protocol):
         """Reset the index."""
         ...
 
+    def check(self) -> None:
+        """Raise if the index is missing or was built with another embedding model."""
+        ...
+
     def search(self, query: str) -> Collection[DocSource]:
         """Search the index for a query."""
         ...
 
+    def warm_up(self) -> Collection[Callable[[], object]]:
+        """Return independent loading steps that can run concurrently before a search."""
+        ...
+
 
 def get_store(config: Config) -> Store:
     if config.store == "chroma":
         from ask_the_code.store.chroma import ChromaStore
 
         return ChromaStore(config)
+    if config.store == "mmap":
+        from ask_the_code.store.mmap import MmapStore
+
+        return MmapStore(config)
 
     err_msg = f"Unknown store: {config.store}"
     raise ValueError(err_msg)
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Collection, Iterable
+from functools import cached_property
+from pathlib import Path
+from typing import Final, cast
+
+import polars as pl
+from FlagEmbedding import FlagReranker
+
+from ask_the_code.chunkers import Source, Text, markdown_chunker
+from ask_the_code.config import Config
+from ask_the_code.dedup import Deduplicator
+from ask_the_code.embedding import Embedder, get_embedder
+from ask_the_code.types import DocSource
+from ask_the_code.utils import cache_home, get_working_path
+
+# Shared by every store, and kept where the reranker has always been cached so
+# that existing downloads are reused
+RERANKER_DIR: Final = "chroma"
+
+
+class BaseStore:
+    """The parts of a store that don't depend on how the vectors are kept."""
+
+    config: Final[Config]
+
+    @property
+    def collection_name(self) -> str:
+        return f"docs-{self.working_path.name}"
+
+    @cached_property
+    def embedder(self) -> Embedder:
+        return get_embedder(self.config)
+
+    @cached_property
+    def reranker(self) -> FlagReranker:
+        return FlagReranker(
+            self.config.reranker_model,
+            use_fp16=True,
+            cache_dir=str(cache_home() / RERANKER_DIR),
+        )
+
+    @cached_property
+    def working_path(self) -> Path:
+        return get_working_path(self.config.repo)
+
+    def __init__(self, config: Config) -> None:
+        self.config = config
+
+    def warm_up(self) -> Collection[Callable[[], object]]:
+        """Return the embedding model and reranker loaders."""
+        return [
+            # Deferred, creating the embedder imports its backend
+            lambda: self.embedder.warm_up(),  # noqa: PLW0108
+            lambda: self.reranker,
+        ]
+
+    def _compute_score(self, query: str, texts: Collection[str]) -> Collection[float]:
+        scores: Collection[float] = self.reranker.compute_score([(query, text) for text in texts])
+        return scores
+
+    def _chunk_document(self, path: Path) -> dict[Source, Text]:
+        relative_path = path.relative_to(self.working_path)
+        return dict(markdown_chunker(path, relative_path))
+
+    def _fold_document(
+        self,
+        chunks: dict[Source, Text],
+        stored_hashes: Iterable[tuple[Source, int]],
+        replaced_aliases: dict[Source, list[Source]],
+    ) -> tuple[dict[Source, Text], dict[Source, int], dict[Source, list[Source]]]:
+        """Fold the chunks of an added document into the stored chunks.
+
+        `stored_hashes` are the SimHashes of the stored chunks that are kept and
+        `replaced_aliases` the aliases of the stored chunks the document replaces.
+        Returns the chunks to store, their SimHashes and the aliases to add to
+        each chunk. Aliases from the document itself must be removed from the
+        kept chunks first, they are added again where they are still duplicates.
+        """
+        dedup = Deduplicator(self.config.dedup_max_distance)
+        for source, value in stored_hashes:
+            dedup.register(source, value)
+
+        new_chunks: dict[Source, Text] = {}
+        added: dict[Source, list[Source]] = {}
+        for source, text in chunks.items():
+            if (canonical := dedup.add(source, text)) is None:
+                new_chunks[source] = text
+            # A replaced chunk keeps its aliases, even when it is now a duplicate itself
+            aliases = [alias for alias in replaced_aliases.get(source, []) if alias not in chunks]
+            added.setdefault(canonical or source, []).extend(aliases)
+        for canonical, aliases in dedup.aliases.items():
+            added.setdefault(canonical, []).extend(aliases)
+
+        hashes = {source: dedup.hashes[source] for source in new_chunks if source in dedup.hashes}
+        return new_chunks, hashes, {source: aliases for source, aliases in added.items() if aliases}
+
+    def _rerank(self, query: str, df: pl.DataFrame, min_score: float) -> list[DocSource]:
+        """Score the `source`/`text`/`aliases` candidates against the query, best first."""
+        if df.is_empty():
+            return []
+        scores = self._compute_score(query, df["text"].to_list())
+        df = (
+            df.with_columns(pl.Series("score", scores))
+            .filter(pl.col("score") > min_score)
+            .sort("score", descending=True)
+        )
+        return cast(list[DocSource], df.to_dicts())
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import contextlib
-from collections.abc import Collection, Iterable
+from collections.abc import Callable, Collection, Iterable
 from functools import cached_property
 from pathlib import Path
 from typing import Final, cast
@@ -10,83 +10,169 @@ from uuid import UUID
 import polars as pl
 from chromadb import PersistentClient
 from chromadb.api import ClientAPI
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
 from chromadb.types import Collection as ChromaCollection
-from FlagEmbedding import FlagReranker
 
-from ask_the_code.chunkers import markdown_chunker
+from ask_the_code.chunkers import Source, Text, markdown_chunker
 from ask_the_code.config import Config
-from ask_the_code.error import CollectionNotFoundError
-from ask_the_code.types import DocSource
-from ask_the_code.utils import cache_home, data_home, get_repo_files, get_working_path
+from ask_the_code.dedup import Deduplicator
+from ask_the_code.embedding import Embedder
+from ask_the_code.error import CollectionNotFoundError, EmbeddingMismatchError
+from ask_the_code.store.base import BaseStore
+from ask_the_code.types import DedupStats, DocSource
+from ask_the_code.utils import chunks, data_home, get_repo_files
 
 CHROMA_NAMESPACE: Final = UUID("c0e5b3b8-0b1d-4d4c-8b1f-8a3f4c6b3b4d")
 CHROMA_DIR: Final = "chroma"
 MAX_BATCH_SIZE: Final = 128
+FINGERPRINT_KEY: Final = "embedding_fingerprint"
+ALIASES_KEY: Final = "aliases"
+ALIAS_SEPARATOR: Final = "\n"
+SIMHASH_KEY: Final = "simhash"
 
 
-class ChromaStore:
-    config: Final[Config]
+def _metadata(aliases: list[Source], value: int | None) -> dict[str, str]:
+    """Chroma metadata can't hold lists, None or unsigned 64-bit ints, so store them as text."""
+    return {
+        ALIASES_KEY: ALIAS_SEPARATOR.join(aliases),
+        SIMHASH_KEY: "" if value is None else f"{value:016x}",
+    }
 
-    @property
-    def collection_name(self) -> str:
-        return f"docs-{self.working_path.name}"
 
-    @cached_property
-    def client(self) -> ClientAPI:
-        return PersistentClient(str(data_home() / CHROMA_DIR))
+class EmbedderFunction(EmbeddingFunction[Documents]):
+    """Adapt an Embedder to Chroma's embedding function interface."""
 
-    @cached_property
-    def reranker(self) -> FlagReranker:
-        return FlagReranker(
-            self.config.reranker_model,
-            use_fp16=True,
-            cache_dir=str(cache_home() / CHROMA_DIR),
-        )
+    def __init__(self, embedder: Embedder) -> None:
+        self.embedder = embedder
+
+    def __call__(self, input: Documents) -> Embeddings:  # noqa: A002
+        return list(self.embedder.embed(input))
+
+    @staticmethod
+    def name() -> str:
+        return "ask-the-code"
+
+
+class ChromaStore(BaseStore):
+    dedup_stats: DedupStats | None
 
     @cached_property
-    def working_path(self) -> Path:
-        return get_working_path(self.config.repo)
+    def client(self) -> ClientAPI:
+        return PersistentClient(str(data_home() / CHROMA_DIR))
 
     def __init__(self, config: Config) -> None:
         """Initialize the ChromaStore."""
-        self.config = config
+        super().__init__(config)
+        self.dedup_stats = None
 
     def _get_collection(self, name: str) -> ChromaCollection:
         try:
             client = self.client
-            return cast(ChromaCollection, client.get_collection(name))
+            embedding_function = EmbedderFunction(self.embedder)
+            collection = client.get_collection(name, embedding_function=embedding_function)  # type: ignore[arg-type]
         except ValueError as e:
             raise CollectionNotFoundError(self.collection_name) from e
 
-    def _compute_score(self, query: str, texts: Collection[str]) -> Collection[float]:
-        scores: Collection[float] = self.reranker.compute_score([(query, text) for text in texts])
-        return scores
+        fingerprint = (collection.metadata or {}).get(FINGERPRINT_KEY)
+        if fingerprint != self.embedder.fingerprint:
+            raise EmbeddingMismatchError(name, fingerprint, self.embedder.fingerprint)
+        return cast(ChromaCollection, collection)
 
     def create(self) -> Iterable[str]:
         """Create the knowledge store."""
         self.reset_index()
+        collection = self._get_collection(self.collection_name)
+        dedup = Deduplicator(self.config.dedup_max_distance)
         files = get_repo_files(self.working_path, self.config.glob)
         for file in files:
             yield str(file)
-            self.add_document(file)
+            md_chunks = markdown_chunker(file, file.relative_to(self.working_path))
+            new_chunks = [(s, t) for s, t in md_chunks if dedup.add(s, t) is None]
+            metadatas = [_metadata([], dedup.hashes.get(source)) for source, _ in new_chunks]
+            self._upsert(collection, new_chunks, metadatas)
+
+        # Duplicates are only known once every file is chunked, record them on the canonical chunks
+        self._update_aliases(collection, dedup.aliases)
+        self.dedup_stats = dedup.stats
 
     def add_document(self, path: Path) -> None:
-        """Add a document to the knowledge store."""
+        """Add a document to the knowledge store.
+
+        The document's chunks replace the stored chunks with the same ids, and
+        are folded into the stored chunks they duplicate.
+        """
         collection = self._get_collection(self.collection_name)
-        relative_path = path.relative_to(self.working_path)
+        doc_chunks = self._chunk_document(path)
+
+        stored = collection.get(include=["metadatas"])  # type: ignore[attr-defined]
+        aliases: dict[Source, list[Source]] = {}
+        hashes: list[tuple[Source, int]] = []
+        for source, metadata in zip(stored["ids"], stored["metadatas"] or []):
+            aliases[source] = [
+                a for a in (metadata or {}).get(ALIASES_KEY, "").split(ALIAS_SEPARATOR) if a
+            ]
+            if source not in doc_chunks and (value := (metadata or {}).get(SIMHASH_KEY)):
+                hashes.append((source, int(value, 16)))
+
+        replaced = {source: aliases.pop(source) for source in doc_chunks if source in aliases}
+        new_chunks, new_hashes, added = self._fold_document(doc_chunks, hashes, replaced)
+        if folded := [source for source in replaced if source not in new_chunks]:
+            collection.delete(ids=folded)  # type: ignore[attr-defined]
+        metadatas = [
+            _metadata(added.get(source, []), new_hashes.get(source)) for source in new_chunks
+        ]
+        self._upsert(collection, list(new_chunks.items()), metadatas)
+
+        updated = {
+            source: [alias for alias in row if alias not in doc_chunks] + added.get(source, [])
+            for source, row in aliases.items()
+        }
+        self._update_aliases(
+            collection, {source: row for source, row in updated.items() if row != aliases[source]}
+        )
 
-        md_chunks = markdown_chunker(path, relative_path)
-        df = pl.from_records(list(md_chunks), schema=["id", "doc"], orient="row")
+    def _upsert(
+        self,
+        collection: ChromaCollection,
+        md_chunks: list[tuple[Source, Text]],
+        metadatas: list[dict[str, str]],
+    ) -> None:
+        df = pl.from_records(md_chunks, schema=["id", "doc"], orient="row")
         for i in range(0, len(df), MAX_BATCH_SIZE):
             chunk = df.slice(i, MAX_BATCH_SIZE)
-            collection.upsert(ids=chunk["id"].to_list(), documents=chunk["doc"].to_list())  # type: ignore[attr-defined]
+            collection.upsert(  # type: ignore[attr-defined]
+                ids=chunk["id"].to_list(),
+                documents=chunk["doc"].to_list(),
+                metadatas=metadatas[i : i + MAX_BATCH_SIZE],
+            )
+
+    def _update_aliases(
+        self, collection: ChromaCollection, aliases: dict[Source, list[Source]]
+    ) -> None:
+        for batch in chunks(aliases.items(), MAX_BATCH_SIZE):
+            collection.update(  # type: ignore[attr-defined]
+                ids=[source for source, _ in batch],
+                metadatas=[{ALIASES_KEY: ALIAS_SEPARATOR.join(row)} for _, row in batch],
+            )
 
     def reset_index(self) -> None:
         """Reset the knowledge store."""
         client = self.client
         with contextlib.suppress(ValueError):
             client.delete_collection(self.collection_name)
-        _ = client.create_collection(self.collection_name)
+        _ = client.create_collection(
+            self.collection_name,
+            embedding_function=EmbedderFunction(self.embedder),  # type: ignore[arg-type]
+            metadata={FINGERPRINT_KEY: self.embedder.fingerprint},
+        )
+
+    def warm_up(self) -> Collection[Callable[[], object]]:
+        """Return the client, embedding model and reranker loaders."""
+        return [lambda: self.client, *super().warm_up()]
+
+    def check(self) -> None:
+        """Raise if the index is missing or was built with another embedding model."""
+        _ = self._get_collection(self.collection_name)
 
     def search(self, query: str, min_score: float = 0.0) -> Collection[DocSource]:
         """Query the knowledge store for content"""
@@ -95,11 +181,15 @@ class ChromaStore:
         if not results or not (documents := results.get("documents")):
             return []
 
-        df = pl.DataFrame({"source": results["ids"], "text": documents}).explode("source", "text")
-        scores = self._compute_score(query, df["text"].to_list())
+        metadatas = results.get("metadatas") or [[None] * len(ids) for ids in results["ids"]]
+        aliases = [[(m or {}).get(ALIASES_KEY, "") for m in metas] for metas in metadatas]
         df = (
-            df.with_columns(pl.Series("score", scores))
-            .filter(pl.col("score") > min_score)
-            .sort("score", descending=True)
+            pl.DataFrame({"source": results["ids"], "text": documents, "aliases": aliases})
+            .explode("source", "text", "aliases")
+            .with_columns(
+                pl.col("aliases")
+                .str.split(ALIAS_SEPARATOR)
+                .list.eval(pl.element().filter(pl.element() != ""))
+            )
         )
-        return cast(list[DocSource], df.to_dicts())
+        return self._rerank(query, df, min_score)
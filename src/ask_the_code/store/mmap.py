@@ -0,0 +1,271 @@
+from __future__ import annotations
+
+import contextlib
+import json
+import shutil
+from collections.abc import Collection, Iterable
+from pathlib import Path
+from typing import Any, Final, cast
+
+import numpy as np
+import polars as pl
+
+from ask_the_code.config import Config
+from ask_the_code.dedup import Deduplicator
+from ask_the_code.embedding import Vectors
+from ask_the_code.error import CollectionNotFoundError, EmbeddingMismatchError
+from ask_the_code.store.base import BaseStore
+from ask_the_code.types import DedupStats, DocSource
+from ask_the_code.utils import data_home, get_repo_files
+
+MMAP_DIR: Final = "mmap"
+META_FILE: Final = "meta.json"
+DOCS_FILE: Final = "docs.parquet"
+TEXTS_FILE: Final = "texts.bin"
+OFFSETS_FILE: Final = "offsets.npy"
+VECTORS_FILE: Final = "vectors.npy"
+SCALES_FILE: Final = "scales.npy"
+HNSW_FILE: Final = "hnsw.bin"
+SEARCH_BLOCK_SIZE: Final = 65_536
+N_RESULTS: Final = 10
+INT8_MAX: Final = 127
+DOCS_SCHEMA: Final = pl.Schema(
+    {
+        "id": pl.String(),
+        "doc": pl.String(),
+        "aliases": pl.List(pl.String()),
+        "simhash": pl.UInt64(),
+    }
+)
+
+
+class MmapStore(BaseStore):
+    """A store that keeps quantized vectors in a memory-mapped NumPy array.
+
+    Each collection is a directory holding the vectors (`vectors.npy`), a
+    per-row scale for int8 quantization (`scales.npy`), the id/aliases/SimHash
+    table whose row numbers are the vector offsets (`docs.parquet`) and, for
+    large collections, an optional HNSW graph (`hnsw.bin`). The texts are kept
+    apart as UTF-8 in one file (`texts.bin`) with the byte offset of each row
+    (`offsets.npy`), so that a search reads only the texts it matched.
+    """
+
+    dedup_stats: DedupStats | None
+
+    @property
+    def collection_path(self) -> Path:
+        return data_home() / MMAP_DIR / self.collection_name
+
+    def __init__(self, config: Config) -> None:
+        """Initialize the MmapStore."""
+        super().__init__(config)
+        self.dedup_stats = None
+
+    def _read_meta(self) -> dict[str, Any]:
+        try:
+            meta: dict[str, Any] = json.loads((self.collection_path / META_FILE).read_text())
+        except FileNotFoundError as e:
+            raise CollectionNotFoundError(self.collection_name) from e
+        return meta
+
+    def _check_fingerprint(self, meta: dict[str, Any]) -> None:
+        indexed, configured = meta.get("embedding"), self.embedder.fingerprint
+        if indexed != configured:
+            raise EmbeddingMismatchError(self.collection_name, indexed, configured)
+
+    def _load_vectors(self) -> Vectors:
+        """Load all vectors, dequantized to float32."""
+        path = self.collection_path
+        vectors = np.load(path / VECTORS_FILE, mmap_mode="r").astype(np.float32)
+        if (path / SCALES_FILE).exists():
+            vectors *= np.load(path / SCALES_FILE)[:, None]
+        return cast(Vectors, vectors)
+
+    def _read_docs(self) -> pl.DataFrame:
+        """Read the whole table, with its texts."""
+        path = self.collection_path
+        texts, offsets = (path / TEXTS_FILE).read_bytes(), np.load(path / OFFSETS_FILE)
+        docs = [texts[start:stop].decode() for start, stop in zip(offsets[:-1], offsets[1:])]
+        df = pl.read_parquet(path / DOCS_FILE)
+        return df.insert_column(1, pl.Series("doc", docs, DOCS_SCHEMA["doc"]))
+
+    def _read_texts(self, rows: list[int]) -> list[str]:
+        path = self.collection_path
+        offsets = np.load(path / OFFSETS_FILE, mmap_mode="r")
+        texts: list[str] = []
+        with (path / TEXTS_FILE).open("rb") as file:
+            for row in rows:
+                _ = file.seek(offsets[row])
+                texts.append(file.read(offsets[row + 1] - offsets[row]).decode())
+        return texts
+
+    def _write(self, df: pl.DataFrame, vectors: Vectors) -> None:
+        """Write the collection, replacing whatever was stored before."""
+        path = self.collection_path
+        for name in (VECTORS_FILE, SCALES_FILE, HNSW_FILE):
+            (path / name).unlink(missing_ok=True)
+
+        texts = [doc.encode() for doc in df["doc"].to_list()]
+        offsets = np.zeros(len(texts) + 1, np.int64)
+        _ = np.cumsum([len(text) for text in texts], out=offsets[1:])
+        (path / TEXTS_FILE).write_bytes(b"".join(texts))
+        np.save(path / OFFSETS_FILE, offsets)
+        df.drop("doc").write_parquet(path / DOCS_FILE)
+        if self.config.mmap_dtype == "int8":
+            scales = np.abs(vectors).max(axis=1, initial=0.0) / INT8_MAX
+            scales[scales == 0] = 1.0
+            np.save(path / VECTORS_FILE, np.round(vectors / scales[:, None]).astype(np.int8))
+            np.save(path / SCALES_FILE, scales.astype(np.float32))
+        else:
+            np.save(path / VECTORS_FILE, vectors.astype(np.float16))
+
+        if not df.is_empty() and len(df) >= self.config.mmap_hnsw_threshold:
+            self._build_hnsw(vectors)
+
+        meta = {
+            "count": len(df),
+            "dim": vectors.shape[1],
+            "dtype": self.config.mmap_dtype,
+            "embedding": self.embedder.fingerprint,
+        }
+        (path / META_FILE).write_text(json.dumps(meta))
+
+    def _build_hnsw(self, vectors: Vectors) -> None:
+        """Build the optional HNSW graph, skipped when hnswlib isn't installed."""
+        try:
+            import hnswlib
+        except ImportError:
+            return
+
+        index = hnswlib.Index(space="ip", dim=vectors.shape[1])
+        index.init_index(max_elements=len(vectors), ef_construction=200, M=16)
+        index.add_items(vectors, np.arange(len(vectors)))
+        index.save_index(str(self.collection_path / HNSW_FILE))
+
+    def _nearest(self, query: Vectors, count: int, n_results: int) -> list[int]:
+        """Return the row offsets of the nearest vectors, best match first."""
+        path = self.collection_path
+        n_results = min(n_results, count)
+        if (path / HNSW_FILE).exists():
+            with contextlib.suppress(ImportError):
+                import hnswlib
+
+                index = hnswlib.Index(space="ip", dim=len(query))
+                index.load_index(str(path / HNSW_FILE), max_elements=count)
+                index.set_ef(max(n_results * 4, 50))
+                labels, _ = index.knn_query(query, k=n_results)
+                return cast(list[int], labels[0].tolist())
+
+        vectors = np.load(path / VECTORS_FILE, mmap_mode="r")
+        scales = np.load(path / SCALES_FILE) if (path / SCALES_FILE).exists() else None
+        scores = np.empty(count, np.float32)
+        for start in range(0, count, SEARCH_BLOCK_SIZE):
+            stop = min(start + SEARCH_BLOCK_SIZE, count)
+            scores[start:stop] = vectors[start:stop].astype(np.float32) @ query
+            if scales is not None:
+                scores[start:stop] *= scales[start:stop]
+
+        top = np.argpartition(-scores, n_results - 1)[:n_results]
+        return cast(list[int], top[np.argsort(-scores[top])].tolist())
+
+    def create(self) -> Iterable[str]:
+        """Create the knowledge store."""
+        self.reset_index()
+        chunks: dict[str, str] = {}
+        parts: list[Vectors] = []
+        dedup = Deduplicator(self.config.dedup_max_distance)
+        files = get_repo_files(self.working_path, self.config.glob)
+        for file in files:
+            yield str(file)
+            new_chunks = {
+                source: text
+                for source, text in self._chunk_document(file).items()
+                if dedup.add(source, text) is None and source not in chunks
+            }
+            # Embed as each file is indexed, so that progress reflects the slowest part
+            if new_chunks:
+                parts.append(self.embedder.embed(list(new_chunks.values())))
+                chunks.update(new_chunks)
+
+        ids, docs = list(chunks), list(chunks.values())
+        aliases = [dedup.aliases.get(source, []) for source in ids]
+        hashes = [dedup.hashes.get(source) for source in ids]
+        df = pl.DataFrame(
+            {"id": ids, "doc": docs, "aliases": aliases, "simhash": hashes}, schema=DOCS_SCHEMA
+        )
+        self._write(df, np.concatenate(parts) if parts else np.empty((0, 0), np.float32))
+        self.dedup_stats = dedup.stats
+
+    def add_document(self, path: Path) -> None:
+        """Add a document to the knowledge store.
+
+        The document's chunks replace the stored chunks with the same ids,
+        and are folded into the stored chunks they duplicate. The files are
+        rewritten as a whole: every stored vector is loaded as float32 and
+        every text is read, then everything is quantized and written again
+        and the HNSW graph, if any, is rebuilt. This costs as much as writing
+        the whole collection, so prefer `create` for more than a handful of
+        documents.
+        """
+        meta = self._read_meta()
+        self._check_fingerprint(meta)
+        chunks = self._chunk_document(path)
+
+        df = self._read_docs()
+        keep = ~df["id"].is_in(list(chunks))
+        new_chunks, hashes, added = self._fold_document(
+            chunks,
+            df.filter(keep).drop_nulls("simhash").select("id", "simhash").iter_rows(),
+            dict(df.filter(~keep).select("id", "aliases").iter_rows()),
+        )
+        # Every chunk may have been folded into a stored one, leaving nothing to embed
+        parts = [self._load_vectors()[keep.to_numpy()]] if meta["count"] else []
+        if new_chunks:
+            parts.append(self.embedder.embed(list(new_chunks.values())))
+        vectors = np.concatenate(parts) if parts else np.empty((0, 0), np.float32)
+
+        new_df = pl.DataFrame(
+            {
+                "id": list(new_chunks),
+                "doc": list(new_chunks.values()),
+                "aliases": [[]] * len(new_chunks),
+                "simhash": [hashes.get(source) for source in new_chunks],
+            },
+            schema=DOCS_SCHEMA,
+        )
+        df = pl.concat([df.filter(keep), new_df])
+        aliases = [
+            [alias for alias in row if alias not in chunks] + added.get(source, [])
+            for source, row in zip(df["id"].to_list(), df["aliases"].to_list())
+        ]
+        self._write(df.with_columns(pl.Series("aliases", aliases, DOCS_SCHEMA["aliases"])), vectors)
+
+    def reset_index(self) -> None:
+        """Reset the knowledge store."""
+        path = self.collection_path
+        shutil.rmtree(path, ignore_errors=True)
+        path.mkdir(parents=True)
+        self._write(pl.DataFrame(schema=DOCS_SCHEMA), np.empty((0, 0), np.float32))
+
+    def check(self) -> None:
+        """Raise if the index is missing or was built with another embedding model."""
+        self._check_fingerprint(self._read_meta())
+
+    def search(self, query: str, min_score: float = 0.0) -> Collection[DocSource]:
+        """Query the knowledge store for content"""
+        meta = self._read_meta()
+        self._check_fingerprint(meta)
+        if not (count := meta["count"]):
+            return []
+
+        df = self._candidates(self.embedder.embed([query])[0], count)
+        return self._rerank(query, df, min_score)
+
+    def _candidates(self, query: Vectors, count: int) -> pl.DataFrame:
+        """Fetch the `source`/`text`/`aliases` of the nearest chunks, nearest first."""
+        rows = self._nearest(query, count, N_RESULTS)
+        return (
+            pl.read_parquet(self.collection_path / DOCS_FILE, columns=["id", "aliases"])[rows]
+            .with_columns(pl.Series("text", self._read_texts(rows), pl.String()))
+            .select(pl.col("id").alias("source"), "text", "aliases")
+        )
@@ -1,12 +1,18 @@
 from __future__ import annotations
 
-from typing_extensions import TypedDict, TypeGuard
+from typing_extensions import NotRequired, TypedDict, TypeGuard
 
 
 class DocSource(TypedDict):
     source: str
     text: str
     score: float
+    aliases: NotRequired[list[str]]
+
+
+class DedupStats(TypedDict):
+    chunks: int
+    duplicates: int
 
 
 def is_doc_source(obj: object) -> TypeGuard[DocSource]:
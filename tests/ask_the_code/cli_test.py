@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import threading
+from collections.abc import Callable
+from io import StringIO
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+from rich.console import Console
+
+from ask_the_code.cli import ask
+from ask_the_code.config import Config
+from ask_the_code.error import CollectionNotFoundError
+
+TIMEOUT = 5
+
+
+def run_ask(store: Mock, llm: Mock) -> None:
+    ask.callback(  # type: ignore[misc]
+        question="How do I install it?",
+        repo=Path(),
+        config=Config(),
+        console=Console(file=StringIO()),
+        store=lambda: store,
+        llm=lambda: llm,
+    )
+
+
+def mock_store(*steps: Callable[[], object]) -> Mock:
+    store = Mock()
+    store.warm_up.return_value = list(steps)
+    store.search.return_value = []
+    return store
+
+
+class TestAsk:
+    def test_ask_warms_up_concurrently(self) -> None:
+        # Every step waits for the others, so running them one by one would time out
+        barrier = threading.Barrier(3, timeout=TIMEOUT)
+        store = mock_store(barrier.wait, barrier.wait)
+        llm = Mock()
+        llm.warm_up.side_effect = barrier.wait
+        llm.answer.return_value = ["answer"]
+
+        run_ask(store, llm)
+
+        store.check.assert_called_once_with()
+        llm.warm_up.assert_called_once_with()
+        llm.answer.assert_called_once_with([], "How do I install it?")
+
+    def test_ask_checks_store_before_warm_up(self) -> None:
+        store = mock_store()
+        store.check.side_effect = CollectionNotFoundError("docs-test")
+        llm = Mock()
+
+        with pytest.raises(CollectionNotFoundError):
+            run_ask(store, llm)
+
+        store.warm_up.assert_not_called()
+        llm.warm_up.assert_not_called()
+
+    def test_ask_fails_without_waiting_for_other_steps(self) -> None:
+        released, finished = threading.Event(), threading.Event()
+
+        def fail() -> None:
+            err_msg = "download failed"
+            raise OSError(err_msg)
+
+        def slow() -> None:
+            _ = released.wait(TIMEOUT)
+            finished.set()
+
+        store = mock_store(fail, slow)
+        llm = Mock()
+        llm.warm_up.side_effect = slow
+
+        try:
+            with pytest.raises(OSError, match="download failed"):
+                run_ask(store, llm)
+            assert not finished.is_set()
+        finally:
+            released.set()
+        store.search.assert_not_called()
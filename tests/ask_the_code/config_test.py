@@ -0,0 +1,15 @@
+import pytest
+from pydantic import ValidationError
+
+from ask_the_code.config import Config
+
+
+class TestConfig:
+    @pytest.mark.parametrize("max_distance", [-1, 64])  # type: ignore[misc]
+    def test_dedup_max_distance_is_validated(self, max_distance: int) -> None:
+        with pytest.raises(ValidationError, match="dedup_max_distance"):
+            Config(dedup_max_distance=max_distance)
+
+    def test_dedup_max_distance_bounds(self) -> None:
+        assert Config(dedup_max_distance=0).dedup_max_distance == 0
+        assert Config(dedup_max_distance=63).dedup_max_distance == 63  # noqa: PLR2004
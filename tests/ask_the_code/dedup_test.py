@@ -0,0 +1,64 @@
+import pytest
+
+from ask_the_code.dedup import Deduplicator, simhash
+
+
+class TestSimhash:
+    def test_simhash_is_stable(self) -> None:
+        assert simhash("Install the package with pip") == simhash("install the package  with pip")
+
+    def test_simhash_differs(self) -> None:
+        assert simhash("Install the package with pip") != simhash("Configure the server port")
+
+    def test_simhash_without_words(self) -> None:
+        assert simhash("") is None
+        assert simhash("| --- | --- |") is None
+        assert simhash("* * *") is None
+
+
+class TestDeduplicator:
+    def test_add_folds_near_duplicates(self) -> None:
+        text = " ".join(f"word{i}" for i in range(200))
+        dedup = Deduplicator(max_distance=3)
+        assert dedup.add("a.md#intro", text) is None
+        assert dedup.add("b.md#intro", text + " extra") == "a.md#intro"
+        assert dedup.add("c.md#other", "something completely different") is None
+        assert dedup.aliases == {"a.md#intro": ["b.md#intro"]}
+        assert dedup.stats == {"chunks": 3, "duplicates": 1}
+
+    def test_add_ignores_same_source(self) -> None:
+        dedup = Deduplicator(max_distance=3)
+        assert dedup.add("a.md#intro", "same text") is None
+        assert dedup.add("a.md#intro", "same text") == "a.md#intro"
+        assert dedup.aliases == {}
+
+    def test_add_never_folds_text_without_words(self) -> None:
+        dedup = Deduplicator(max_distance=3)
+        assert dedup.add("a.md#table", "| --- | --- |") is None
+        assert dedup.add("b.md#rule", "* * *") is None
+        assert dedup.add("c.md#empty", "") is None
+        assert dedup.aliases == {}
+        assert dedup.hashes == {}
+        assert dedup.stats == {"chunks": 3, "duplicates": 0}
+
+    def test_register_folds_into_stored_chunk(self) -> None:
+        text = " ".join(f"word{i}" for i in range(200))
+        value = simhash(text)
+        assert value is not None
+        dedup = Deduplicator(max_distance=3)
+        dedup.register("a.md#intro", value)
+        assert dedup.add("b.md#intro", text) == "a.md#intro"
+        assert dedup.aliases == {"a.md#intro": ["b.md#intro"]}
+        assert dedup.hashes == {"a.md#intro": value}
+        assert dedup.stats == {"chunks": 1, "duplicates": 1}
+
+    def test_add_exact_only(self) -> None:
+        text = " ".join(f"word{i}" for i in range(200))
+        dedup = Deduplicator(max_distance=0)
+        assert dedup.add("a.md", text) is None
+        assert dedup.add("b.md", text.replace("word7 ", "")) is None
+
+    @pytest.mark.parametrize("max_distance", [-1, 64])  # type: ignore[misc]
+    def test_init_raises_error(self, max_distance: int) -> None:
+        with pytest.raises(ValueError, match="max_distance"):
+            Deduplicator(max_distance)
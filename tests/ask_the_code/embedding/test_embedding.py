@@ -0,0 +1,49 @@
+from unittest.mock import Mock
+
+import numpy as np
+import pytest
+
+from ask_the_code.config import Config
+from ask_the_code.embedding import Vectors, embed_batched, get_embedder, sorted_batches
+
+
+def test_sorted_batches_groups_by_length() -> None:
+    # Arrange
+    texts = ["a" * 10, "b", "c" * 9, "d" * 2]
+    # Act
+    batches = list(sorted_batches(texts, max_batch_chars=20))
+    # Assert
+    assert batches == [[0, 2], [3, 1]]
+
+
+def test_sorted_batches_keeps_oversized_text() -> None:
+    # Act
+    batches = list(sorted_batches(["a" * 100, "b"], max_batch_chars=10))
+    # Assert
+    assert batches == [[0], [1]]
+
+
+def test_embed_batched_restores_order() -> None:
+    # Arrange
+    texts = ["aaa", "b", "cc"]
+    encode = Mock(side_effect=lambda batch: np.array([[len(t)] for t in batch], np.float32))
+    # Act
+    vectors: Vectors = embed_batched(texts, encode, max_batch_chars=4)
+    # Assert
+    assert vectors.tolist() == [[3.0], [1.0], [2.0]]
+    assert [c.args[0] for c in encode.call_args_list] == [["aaa"], ["cc", "b"]]
+
+
+def test_embed_batched_empty() -> None:
+    # Act
+    vectors = embed_batched([], Mock(), max_batch_chars=4)
+    # Assert
+    assert vectors.shape == (0, 0)
+
+
+def test_get_embedder_raises_error() -> None:
+    # Arrange
+    config = Mock(spec=Config, embedding_backend="unknown")
+    # Act/Assert
+    with pytest.raises(ValueError, match="Unknown embedding backend"):
+        get_embedder(config)
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+import numpy as np
+import pytest
+
+from ask_the_code.config import Config
+from ask_the_code.embedding.onnx import OnnxEmbedder
+from ask_the_code.error import UnsupportedModelError
+
+TRANSFORMER: dict[str, str] = {
+    "path": "",
+    "type": "sentence_transformers.models.Transformer",
+}
+POOLING: dict[str, str] = {
+    "path": "1_Pooling",
+    "type": "sentence_transformers.models.Pooling",
+}
+
+
+def write_model(
+    path: Path,
+    modules: list[dict[str, str]] | None = None,
+    pooling: str = "mean_tokens",
+    max_seq_length: int = 256,
+) -> None:
+    (path / "1_Pooling").mkdir(parents=True)
+    (path / "config.json").write_text(json.dumps({"hidden_size": 2}))
+    (path / "modules.json").write_text(json.dumps(modules or [TRANSFORMER, POOLING]))
+    (path / "sentence_bert_config.json").write_text(json.dumps({"max_seq_length": max_seq_length}))
+    (path / "1_Pooling/config.json").write_text(json.dumps({f"pooling_mode_{pooling}": True}))
+
+
+@pytest.fixture  # type: ignore[misc]
+def mock_config(tmp_path: Path) -> Mock:
+    return Mock(
+        spec=Config,
+        embedding_model=str(tmp_path),
+        embedding_threads=0,
+        embedding_batch_chars=1024,
+    )
+
+
+@pytest.fixture  # type: ignore[misc]
+def embedder(mock_config: Mock) -> OnnxEmbedder:
+    embedder = OnnxEmbedder(mock_config)
+    # Two texts, the second padded, with the same hidden states per token
+    embedder.tokenizer = Mock(
+        return_value={
+            "input_ids": np.array([[1, 2, 3], [1, 2, 0]]),
+            "attention_mask": np.array([[1, 1, 1], [1, 1, 0]]),
+        }
+    )
+    embedder.session = Mock()
+    embedder.session.get_inputs.return_value = [
+        SimpleNamespace(name="input_ids"),
+        SimpleNamespace(name="attention_mask"),
+        SimpleNamespace(name="token_type_ids"),
+    ]
+    hidden = np.array([[1, 0], [0, 1], [0, 1]], np.float32)
+    embedder.session.run.return_value = [np.stack([hidden, hidden])]
+    return embedder
+
+
+def test_embed_mean_pooling(embedder: OnnxEmbedder, tmp_path: Path) -> None:
+    # Arrange
+    write_model(tmp_path)
+    # Act
+    vectors = embedder.embed(["abc", "ab"])
+    # Assert
+    inputs = embedder.session.run.call_args.args[1]
+    assert inputs["token_type_ids"].tolist() == [[0, 0, 0], [0, 0, 0]]
+    assert np.allclose(vectors, [[1 / 5**0.5, 2 / 5**0.5], [0.5**0.5, 0.5**0.5]])
+
+
+def test_embed_cls_pooling(embedder: OnnxEmbedder, tmp_path: Path) -> None:
+    # Arrange
+    write_model(tmp_path, pooling="cls_token")
+    # Act
+    vectors = embedder.embed(["abc", "ab"])
+    # Assert
+    assert np.allclose(vectors, [[1, 0], [1, 0]])
+
+
+def test_embed_truncates_to_max_seq_length(embedder: OnnxEmbedder, tmp_path: Path) -> None:
+    # Arrange
+    write_model(tmp_path, max_seq_length=128)
+    # Act
+    _ = embedder.embed(["abc", "ab"])
+    # Assert
+    embedder.tokenizer.assert_called_once_with(
+        ["abc", "ab"], padding=True, truncation=True, max_length=128, return_tensors="np"
+    )
+
+
+def test_max_length_is_not_capped(embedder: OnnxEmbedder, tmp_path: Path) -> None:
+    # Arrange
+    write_model(tmp_path, max_seq_length=8192)
+    # Assert
+    assert embedder.max_length == 8192  # noqa: PLR2004
+
+
+def test_max_length_defaults_to_model_limits(embedder: OnnxEmbedder, tmp_path: Path) -> None:
+    # Arrange
+    write_model(tmp_path)
+    (tmp_path / "sentence_bert_config.json").unlink()
+    (tmp_path / "config.json").write_text(
+        json.dumps({"hidden_size": 2, "max_position_embeddings": 514})
+    )
+    embedder.tokenizer.model_max_length = 512
+    # Assert
+    assert embedder.max_length == 512  # noqa: PLR2004
+
+
+def test_fingerprint(embedder: OnnxEmbedder, tmp_path: Path) -> None:
+    # Arrange
+    write_model(tmp_path)
+    # Assert
+    assert embedder.fingerprint == f"{tmp_path}:2"
+
+
+@pytest.mark.parametrize("pooling", ["max_tokens", "lasttoken", "weightedmean_tokens"])  # type: ignore[misc]
+def test_unsupported_pooling_raises_error(
+    embedder: OnnxEmbedder, tmp_path: Path, pooling: str
+) -> None:
+    # Arrange
+    write_model(tmp_path, pooling=pooling)
+    # Act/Assert
+    with pytest.raises(UnsupportedModelError, match=pooling):
+        _ = embedder.fingerprint
+
+
+def test_unsupported_module_raises_error(embedder: OnnxEmbedder, tmp_path: Path) -> None:
+    # Arrange
+    dense = {"path": "2_Dense", "type": "sentence_transformers.models.Dense"}
+    write_model(tmp_path, modules=[TRANSFORMER, POOLING, dense])
+    # Act/Assert
+    with pytest.raises(UnsupportedModelError, match="Dense"):
+        embedder.embed(["abc"])
+
+
+def test_session_threads(mock_config: Mock, tmp_path: Path) -> None:
+    # Arrange
+    mock_config.embedding_threads = 2
+    embedder = OnnxEmbedder(mock_config)
+    # Act
+    with patch("ask_the_code.embedding.onnx.ort.InferenceSession") as session:
+        _ = embedder.session
+    # Assert
+    options = session.call_args.args[1]
+    assert session.call_args.args[0] == str(tmp_path / "onnx/model.onnx")
+    assert (options.intra_op_num_threads, options.inter_op_num_threads) == (2, 1)
+
+
+def test_warm_up_loads_model(mock_config: Mock, tmp_path: Path) -> None:
+    # Arrange
+    write_model(tmp_path)
+    embedder = OnnxEmbedder(mock_config)
+    session_class = "ask_the_code.embedding.onnx.ort.InferenceSession"
+    from_pretrained = "transformers.AutoTokenizer.from_pretrained"
+    # Act
+    with patch(session_class) as session, patch(from_pretrained) as tokenizer:
+        embedder.warm_up()
+    # Assert
+    session.assert_called_once()
+    tokenizer.assert_called_once_with(str(tmp_path))
+    assert (embedder.max_length, embedder.pooling) == (256, "mean_tokens")
@@ -0,0 +1,72 @@
+from collections.abc import Iterable
+from unittest.mock import Mock, patch
+
+import numpy as np
+import pytest
+
+from ask_the_code.config import Config
+from ask_the_code.embedding.sbert import SentenceTransformerEmbedder
+
+
+@pytest.fixture  # type: ignore[misc]
+def mock_config() -> Mock:
+    return Mock(
+        spec=Config,
+        embedding_model="test/model",
+        embedding_threads=0,
+        embedding_batch_chars=1024,
+    )
+
+
+@pytest.fixture  # type: ignore[misc]
+def mock_model() -> Iterable[Mock]:
+    with patch("ask_the_code.embedding.sbert.SentenceTransformer") as model_class:
+        model = model_class.return_value
+        model.get_sentence_embedding_dimension.return_value = 2
+        model.encode.side_effect = lambda texts, **_: np.array(
+            [[len(text), 0] for text in texts], np.float32
+        )
+        yield model_class
+
+
+def test_embed(mock_config: Mock, mock_model: Mock) -> None:
+    # Arrange
+    embedder = SentenceTransformerEmbedder(mock_config)
+    # Act
+    vectors = embedder.embed(["ab", "abcd"])
+    # Assert
+    assert vectors.tolist() == [[2.0, 0.0], [4.0, 0.0]]
+    mock_model.return_value.encode.assert_called_once_with(
+        ["abcd", "ab"], batch_size=2, convert_to_numpy=True, normalize_embeddings=True
+    )
+
+
+def test_fingerprint(mock_config: Mock, mock_model: Mock) -> None:
+    # Act
+    embedder = SentenceTransformerEmbedder(mock_config)
+    # Assert
+    assert embedder.fingerprint == "test/model:2"
+    assert mock_model.call_args.args == ("test/model",)
+    assert mock_model.call_args.kwargs["device"] == "cpu"
+
+
+@pytest.mark.parametrize(("threads", "calls"), [(0, []), (3, [3])])  # type: ignore[misc]
+def test_model_threads(mock_config: Mock, mock_model: Mock, threads: int, calls: list[int]) -> None:
+    # Arrange
+    del mock_model  # Unused
+    mock_config.embedding_threads = threads
+    embedder = SentenceTransformerEmbedder(mock_config)
+    # Act
+    with patch("torch.set_num_threads") as set_num_threads:
+        _ = embedder.model
+    # Assert
+    assert [c.args[0] for c in set_num_threads.call_args_list] == calls
+
+
+def test_warm_up_loads_model(mock_config: Mock, mock_model: Mock) -> None:
+    # Arrange
+    embedder = SentenceTransformerEmbedder(mock_config)
+    # Act
+    embedder.warm_up()
+    # Assert
+    mock_model.assert_called_once()
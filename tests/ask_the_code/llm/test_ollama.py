@@ -0,0 +1,33 @@
+from collections.abc import Iterable
+from unittest.mock import Mock, patch
+
+import pytest
+
+from ask_the_code.config import Config
+from ask_the_code.llm.ollama import Ollama
+
+
+@pytest.fixture  # type: ignore[misc]
+def mock_client() -> Iterable[Mock]:
+    with patch("ask_the_code.llm.ollama.Client") as client_class:
+        yield client_class.return_value
+
+
+def test_warm_up_loads_model(mock_client: Mock) -> None:
+    # Arrange
+    ollama = Ollama(Config(ollama_model="test-model"))
+    # Act
+    ollama.warm_up()
+    # Assert
+    mock_client.generate.assert_called_once_with("test-model")
+
+
+def test_generate_streams_responses(mock_client: Mock) -> None:
+    # Arrange
+    mock_client.generate.return_value = [{"response": "a"}, {"done": True}, {"response": "b"}]
+    ollama = Ollama(Config(ollama_model="test-model"))
+    # Act
+    result = list(ollama.generate("prompt"))
+    # Assert
+    assert result == ["a", "b"]
+    mock_client.generate.assert_called_once_with("test-model", prompt="prompt", stream=True)
@@ -0,0 +1,27 @@
+from collections.abc import Sequence
+from typing import cast
+
+import numpy as np
+
+from ask_the_code.embedding import Vectors, embed_batched
+
+
+class FakeEmbedder:
+    """Embed each text as its letter counts, so similar texts have similar vectors."""
+
+    fingerprint = "fake:26"
+
+    def _encode(self, texts: list[str]) -> Vectors:
+        vectors = np.array(
+            [[text.count(letter) for letter in "abcdefghijklmnopqrstuvwxyz"] for text in texts],
+            np.float32,
+        )
+        norms = np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return cast(Vectors, vectors / norms)
+
+    def embed(self, texts: Sequence[str]) -> Vectors:
+        # Batched like the real backends, so empty input has no dimension either
+        return embed_batched(texts, self._encode, max_batch_chars=1024)
+
+    def warm_up(self) -> None:
+        pass
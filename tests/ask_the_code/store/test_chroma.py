@@ -1,14 +1,16 @@
 from collections.abc import Iterable
 from pathlib import Path
 from tempfile import TemporaryDirectory, mkstemp
-from unittest.mock import Mock
+from unittest.mock import ANY, Mock, patch
 
 import pytest
+from chromadb import PersistentClient
 from git import Git
 
 from ask_the_code.config import Config
-from ask_the_code.error import CollectionNotFoundError
-from ask_the_code.store.chroma import ChromaStore
+from ask_the_code.error import CollectionNotFoundError, EmbeddingMismatchError
+from ask_the_code.store.chroma import ALIASES_KEY, FINGERPRINT_KEY, SIMHASH_KEY, ChromaStore
+from tests.ask_the_code.store.fakes import FakeEmbedder
 
 
 @pytest.fixture(scope="session")  # type: ignore[misc]
@@ -53,6 +55,7 @@ def test_collection_name(mock_config: Mock) -> None:
 
 def test_get_collection_raises_error(mock_config: Mock, test_file: str) -> None:
     store = ChromaStore(mock_config)
+    store.embedder = Mock(fingerprint="model:4")
     # Act/Assert
     with pytest.raises(CollectionNotFoundError):
         store.add_document(Path(test_file))
@@ -61,27 +64,92 @@ def test_get_collection_raises_error(mock_config: Mock, test_file: str) -> None:
 def test_reset_index(mock_config: Mock) -> None:
     # Arrange
     store = ChromaStore(mock_config)
+    store.embedder = Mock(fingerprint="model:4")
     store.client = Mock()
     # Act
     store.reset_index()
     # Assert
     store.client.delete_collection.assert_called_once_with(store.collection_name)
-    store.client.create_collection.assert_called_once_with(store.collection_name)
+    store.client.create_collection.assert_called_once_with(
+        store.collection_name,
+        embedding_function=ANY,
+        metadata={FINGERPRINT_KEY: "model:4"},
+    )
+
+
+def test_get_collection_raises_embedding_mismatch(mock_config: Mock) -> None:
+    # Arrange
+    store = ChromaStore(mock_config)
+    store.embedder = Mock(fingerprint="model:4")
+    store.client = Mock()
+    store.client.get_collection().metadata = {FINGERPRINT_KEY: "other-model:8"}
+    # Act/Assert
+    with pytest.raises(EmbeddingMismatchError):
+        store.search("test query")
 
 
 def test_search(mock_config: Mock) -> None:
     # Arrange
     store = ChromaStore(mock_config)
+    store.embedder = Mock(fingerprint="model:4")
     store.reranker = Mock()
     store.reranker.compute_score.return_value = [0.5, 0.6]
     store.client = Mock()
+    store.client.get_collection().metadata = {FINGERPRINT_KEY: "model:4"}
     store.client.get_collection().query = Mock(
-        return_value={"documents": [["doc1", "doc2"]], "ids": [["id1", "id2"]]}
+        return_value={
+            "documents": [["doc1", "doc2"]],
+            "ids": [["id1", "id2"]],
+            "metadatas": [[{ALIASES_KEY: "id3\nid4"}, {ALIASES_KEY: ""}]],
+        }
     )
     # Act
     result = store.search("test query", min_score=0.4)
     # Assert
     assert result == [
-        {"source": "id2", "text": "doc2", "score": 0.6},
-        {"source": "id1", "text": "doc1", "score": 0.5},
+        {"source": "id2", "text": "doc2", "score": 0.6, "aliases": []},
+        {"source": "id1", "text": "doc1", "score": 0.5, "aliases": ["id3", "id4"]},
     ]
+
+
+def test_warm_up(mock_config: Mock) -> None:
+    # Arrange
+    store = ChromaStore(mock_config)
+    store.client = Mock()
+    store.embedder = Mock(fingerprint="model:4")
+    store.reranker = Mock()
+    # Act
+    results = [step() for step in store.warm_up()]
+    # Assert
+    assert results == [store.client, store.embedder.warm_up.return_value, store.reranker]
+    store.embedder.warm_up.assert_called_once_with()
+
+
+def test_add_document_after_create_keeps_aliases(tmp_path: Path) -> None:
+    # Arrange
+    config = Mock(spec=Config, repo=tmp_path, dedup_max_distance=3, glob="**/*.md")
+    store = ChromaStore(config)
+    store.client = PersistentClient(str(tmp_path / "chroma"))
+    store.embedder = FakeEmbedder()
+    store.working_path = tmp_path
+    setup = "run the install script then start the server"
+    files = [tmp_path / "a.md", tmp_path / "b.md", tmp_path / "c.md"]
+    files[0].write_text(f"# Setup\n\n{setup}\n")
+    files[1].write_text(f"# Install\n\n{setup}\n")
+    files[2].write_text(f"# Copy\n\n{setup}\n")
+    _ = store.client.get_or_create_collection(store.collection_name)  # Replaced by create
+    with patch("ask_the_code.store.chroma.get_repo_files", return_value=files[:2]):
+        _ = list(store.create())
+    # Act
+    store.add_document(files[2])  # A new duplicate is folded into the stored chunk
+    store.add_document(files[0])  # Replacing the chunk keeps its aliases
+    files[1].write_text("# Install\n\ncompile everything from source with make\n")
+    store.add_document(files[1])  # An alias that changed is stored on its own
+    stored = store.client.get_collection(store.collection_name).get(include=["metadatas"])
+    # Assert
+    metadatas = dict(zip(stored["ids"], stored["metadatas"] or []))
+    assert {source: meta[ALIASES_KEY] for source, meta in metadatas.items()} == {
+        "a.md#setup": "c.md#copy",
+        "b.md#install": "",
+    }
+    assert all(meta[SIMHASH_KEY] for meta in metadatas.values())
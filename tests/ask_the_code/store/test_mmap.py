@@ -0,0 +1,256 @@
+from collections.abc import Iterable
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import numpy as np
+import polars as pl
+import pytest
+
+from ask_the_code.config import Config
+from ask_the_code.error import CollectionNotFoundError, EmbeddingMismatchError
+from ask_the_code.store.mmap import (
+    DOCS_FILE,
+    DOCS_SCHEMA,
+    HNSW_FILE,
+    META_FILE,
+    SCALES_FILE,
+    MmapStore,
+)
+from tests.ask_the_code.store.fakes import FakeEmbedder
+
+
+def docs_frame(ids: list[str], docs: list[str]) -> pl.DataFrame:
+    return pl.DataFrame(
+        {"id": ids, "doc": docs, "aliases": [[]] * len(ids), "simhash": [None] * len(ids)},
+        schema=DOCS_SCHEMA,
+    )
+
+
+@pytest.fixture  # type: ignore[misc]
+def data_dir(tmp_path: Path) -> Iterable[Path]:
+    with patch("ask_the_code.store.mmap.data_home", return_value=tmp_path / "data"):
+        yield tmp_path / "data"
+
+
+@pytest.fixture  # type: ignore[misc]
+def mock_config() -> Mock:
+    return Mock(
+        spec=Config,
+        repo=Path("test_repo"),
+        mmap_dtype="float16",
+        mmap_hnsw_threshold=100,
+        dedup_max_distance=3,
+        glob="**/*.md",
+    )
+
+
+@pytest.fixture  # type: ignore[misc]
+def store(mock_config: Mock, data_dir: Path) -> MmapStore:
+    del data_dir  # Unused
+    store = MmapStore(mock_config)
+    store.working_path = Path("test_repo")
+    store.embedder = FakeEmbedder()
+    store.reranker = Mock()
+    store.reranker.compute_score.side_effect = lambda pairs: [
+        1.0 / (i + 1) for i in range(len(pairs))
+    ]
+    return store
+
+
+def test_collection_name(store: MmapStore) -> None:
+    # Assert
+    assert store.collection_name == "docs-test_repo"
+
+
+def test_search_raises_error(store: MmapStore) -> None:
+    # Act/Assert
+    with pytest.raises(CollectionNotFoundError):
+        store.search("test query")
+
+
+def test_reset_index(store: MmapStore) -> None:
+    # Act
+    store.reset_index()
+    # Assert
+    assert store.search("test query") == []
+
+
+@pytest.mark.parametrize("dtype", ["float16", "int8"])  # type: ignore[misc]
+def test_search(store: MmapStore, mock_config: Mock, dtype: str) -> None:
+    # Arrange
+    mock_config.mmap_dtype = dtype
+    store.reset_index()
+    docs = ["aaaa", "bbbb", "cccc", "aabb"]
+    ids = [f"id{i}" for i in range(len(docs))]
+    store._write(docs_frame(ids, docs), store.embedder.embed(docs))  # noqa: SLF001
+    # Act
+    result = store.search("aaa", min_score=0.4)
+    # Assert
+    assert (store.collection_path / SCALES_FILE).exists() == (dtype == "int8")
+    assert [source["source"] for source in result] == ["id0", "id3"]
+
+
+def test_texts_are_kept_apart_from_ids(store: MmapStore) -> None:
+    # Arrange
+    store.reset_index()
+    docs = ["héllo", "", "wörld ✓"]
+    store._write(docs_frame(["id0", "id1", "id2"], docs), store.embedder.embed(docs))  # noqa: SLF001
+    # Act
+    texts = store._read_texts([2, 0, 1])  # noqa: SLF001
+    # Assert
+    assert texts == ["wörld ✓", "héllo", ""]
+    assert store._read_docs()["doc"].to_list() == docs  # noqa: SLF001
+    assert "doc" not in pl.read_parquet(store.collection_path / DOCS_FILE).columns
+
+
+def test_search_raises_embedding_mismatch(store: MmapStore) -> None:
+    # Arrange
+    store.reset_index()
+    meta_path = store.collection_path / META_FILE
+    meta_path.write_text(meta_path.read_text().replace("fake:26", "other-model:8"))
+    # Act/Assert
+    with pytest.raises(EmbeddingMismatchError):
+        store.search("test query")
+
+
+def test_add_document_upserts(store: MmapStore, tmp_path: Path) -> None:
+    # Arrange
+    store.working_path = tmp_path
+    document = tmp_path / "README.md"
+    document.write_text("# Title\n\naaaa\n")
+    store.reset_index()
+    store.add_document(document)
+    document.write_text("# Title\n\nbbbb\n")
+    # Act
+    store.add_document(document)
+    result = store.search("bbb")
+    # Assert
+    assert [(source["source"], source["text"]) for source in result] == [
+        ("README.md#title", "bbbb\n")
+    ]
+
+
+def test_create_folds_duplicates(store: MmapStore, tmp_path: Path) -> None:
+    # Arrange
+    store.working_path = tmp_path
+    files = [tmp_path / "a.md", tmp_path / "b.md", tmp_path / "c.md"]
+    files[0].write_text("# Setup\n\nrun the install script then start the server\n")
+    files[1].write_text("# Install\n\nrun the install script then start the server\n")
+    files[2].write_text("# Other\n\nsomething completely different\n")
+    # Act
+    with patch("ask_the_code.store.mmap.get_repo_files", return_value=files):
+        _ = list(store.create())
+    result = list(store.search("install script"))
+    # Assert
+    assert store.dedup_stats == {"chunks": 3, "duplicates": 1}
+    assert result[0]["source"] == "a.md#setup"
+    assert result[0].get("aliases") == ["b.md#install"]
+
+
+def test_create_embeds_each_file_as_it_is_indexed(store: MmapStore, tmp_path: Path) -> None:
+    # Arrange
+    store.working_path = tmp_path
+    store.embedder = Mock(wraps=FakeEmbedder(), fingerprint="fake:26")
+    files = [tmp_path / "a.md", tmp_path / "b.md"]
+    files[0].write_text("# A\n\naaaa\n")
+    files[1].write_text("# B\n\nbbbb\n")
+    # Act
+    with patch("ask_the_code.store.mmap.get_repo_files", return_value=files):
+        progress = iter(store.create())
+        _ = next(progress), next(progress)
+        embedded = [c.args[0] for c in store.embedder.embed.call_args_list]
+        _ = list(progress)
+    # Assert
+    assert embedded == [["aaaa\n"]]
+    assert [source["source"] for source in store.search("bbb")] == ["b.md#b", "a.md#a"]
+
+
+def test_add_document_after_create_keeps_aliases(store: MmapStore, tmp_path: Path) -> None:
+    # Arrange
+    store.working_path = tmp_path
+    setup = "run the install script then start the server"
+    files = [tmp_path / "a.md", tmp_path / "b.md", tmp_path / "c.md"]
+    files[0].write_text(f"# Setup\n\n{setup}\n")
+    files[1].write_text(f"# Install\n\n{setup}\n")
+    files[2].write_text(f"# Copy\n\n{setup}\n")
+    with patch("ask_the_code.store.mmap.get_repo_files", return_value=files[:2]):
+        _ = list(store.create())
+    # Act
+    store.add_document(files[2])  # A new duplicate is folded into the stored chunk
+    store.add_document(files[0])  # Replacing the chunk keeps its aliases
+    files[1].write_text("# Install\n\ncompile everything from source with make\n")
+    store.add_document(files[1])  # An alias that changed is stored on its own
+    df = pl.read_parquet(store.collection_path / DOCS_FILE)
+    # Assert
+    assert df.select("id", "aliases").sort("id").rows() == [
+        ("a.md#setup", ["c.md#copy"]),
+        ("b.md#install", []),
+    ]
+    assert df["simhash"].null_count() == 0
+
+
+def test_add_document_with_every_chunk_folded(store: MmapStore, tmp_path: Path) -> None:
+    # Arrange
+    store.working_path = tmp_path
+    files = [tmp_path / "a.md", tmp_path / "vendor.md"]
+    for file in files:
+        file.write_text("# Setup\n\nrun the install script then start the server\n")
+    with patch("ask_the_code.store.mmap.get_repo_files", return_value=files[:1]):
+        _ = list(store.create())
+    # Act
+    store.add_document(files[1])
+    result = list(store.search("install script"))
+    # Assert
+    assert [(source["source"], source.get("aliases")) for source in result] == [
+        ("a.md#setup", ["vendor.md#setup"])
+    ]
+
+
+def test_search_falls_back_without_hnswlib(store: MmapStore, mock_config: Mock) -> None:
+    # Arrange
+    mock_config.mmap_hnsw_threshold = 1
+    store.reset_index()
+    docs = ["aaaa", "bbbb"]
+    with patch.dict("sys.modules", {"hnswlib": None}):
+        store._write(docs_frame(["id0", "id1"], docs), store.embedder.embed(docs))  # noqa: SLF001
+        # Act
+        result = store.search("bbb")
+    # Assert
+    assert not (store.collection_path / HNSW_FILE).exists()
+    assert [source["source"] for source in result] == ["id1", "id0"]
+
+
+def test_nearest_matches_exact_search(store: MmapStore) -> None:
+    # Arrange
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((50, 8)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    store.reset_index()
+    store._write(docs_frame([str(i) for i in range(50)], ["doc"] * 50), vectors)  # noqa: SLF001
+    # Act
+    rows = store._nearest(vectors[7], 50, 5)  # noqa: SLF001
+    # Assert
+    assert rows == np.argsort(-(vectors @ vectors[7]))[:5].tolist()
+
+
+def test_search_uses_hnsw(store: MmapStore, mock_config: Mock) -> None:
+    # Arrange
+    pytest.importorskip("hnswlib")
+    mock_config.mmap_hnsw_threshold = 50
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((200, 8)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    store.reset_index()
+    store._write(docs_frame([str(i) for i in range(200)], ["doc"] * 200), vectors)  # noqa: SLF001
+    # Act
+    rows = store._nearest(vectors[7], 200, 5)  # noqa: SLF001
+    # Assert
+    assert (store.collection_path / HNSW_FILE).exists()
+    assert rows == np.argsort(-(vectors @ vectors[7]))[:5].tolist()
+
+
+def test_warm_up(store: MmapStore) -> None:
+    # Act
+    results = [step() for step in store.warm_up()]
+    # Assert
+    assert results == [None, store.reranker]